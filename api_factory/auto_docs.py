@@ -1,5 +1,5 @@
 import re
-import inspect
+import functools
 
 from typing import List, Dict
 
@@ -8,34 +8,62 @@ from .fields import (BaseField, SubformField, ListSubformField, DictSubformField
                      BooleanField, NumericField, FloatField, IntegerField, ListField, DictField, JSONField)
 
 
+# maps a field class to its documented type name
+_TYPE_MAP = {
+    StringField: 'str',
+    BooleanField: 'bool',
+    FloatField: 'float',
+    IntegerField: 'int',
+    JSONField: 'json',
+    ListSubformField: 'list subform',
+    DictSubformField: 'dict subform',
+    SubformField: 'subform',
+}
+
+# container fields, documented together with their element type
+_RECURSIVE = {
+    ListField: 'list[%s]',
+    DictField: 'dict[%s]',
+}
+
+
 def get_field_type(field) -> str:
     # if object is a class (taken from field_type)
-    if inspect.isclass(field):
+    if isinstance(field, type):
         field = field()
 
-    if isinstance(field, StringField):
-        return 'str'
-    if isinstance(field, BooleanField):
-        return 'bool'
-    if isinstance(field, FloatField):
-        return 'float'
-    if isinstance(field, IntegerField):
-        return 'int'
-    if isinstance(field, JSONField):
-        return 'json'
-    if isinstance(field, ListField):
-        return 'list[%s]' % get_field_type(field.field_type)
-    if isinstance(field, DictField):
-        return 'dict[%s]' % get_field_type(field.field_type)
-    if isinstance(field, ListSubformField):
-        return 'list subform'
-    if isinstance(field, DictSubformField):
-        return 'dict subform'
-    if isinstance(field, SubformField):
-        return 'subform'
+    # fields are usually instances of the library classes, so try the exact type first
+    # and walk the MRO only for the custom subclasses
+    for field_cls in type(field).__mro__:
+        type_name = _TYPE_MAP.get(field_cls)
+        if type_name is not None:
+            return type_name
+
+        type_template = _RECURSIVE.get(field_cls)
+        if type_template is not None:
+            return type_template % get_field_type(field.field_type)
+
+
+def copy_docs(docs):
+    """ Copies the nested docs dicts, so the callers may change the docs without touching the cached ones """
+
+    if type(docs) is dict:
+        return {key: copy_docs(value) for key, value in docs.items()}
+    return docs
+
+
+def _get_field_info(field: BaseField) -> Dict:
+    # fields are immutable after the creation, so the docs are built once and kept on the field
+    if field._doc is None:
+        field._doc = build_field_info(field)
+    return field._doc
 
 
 def get_field_info(field: BaseField) -> Dict:
+    return copy_docs(_get_field_info(field))
+
+
+def build_field_info(field: BaseField) -> Dict:
     docs = {
         'description': field.help,
         'required': field.required,
@@ -43,7 +71,7 @@ def get_field_info(field: BaseField) -> Dict:
 
     details = {'type': get_field_type(field)}
     if isinstance(field, SubformField):
-        details['subform'] = collect_forms_documentation(field.subform)
+        details['subform'] = _collect_forms_documentation(field.subform)
     else:
         details['default'] = field.default
 
@@ -60,25 +88,43 @@ def get_field_info(field: BaseField) -> Dict:
     return docs
 
 
-def collect_forms_documentation(form) -> Dict:
+# forms and fields are immutable after the class creation, so the docs are built once per form
+@functools.lru_cache(maxsize=None)
+def _collect_forms_documentation(form) -> Dict:
     if form is not None:
-        return {key: get_field_info(field) for key, field in form.fields}
+        return {key: _get_field_info(field) for key, field in form.fields}
+
+
+def collect_forms_documentation(form) -> Dict:
+    return copy_docs(_collect_forms_documentation(form))
+
 
+# splits a CamelCase class name into words
+_NAME_CHUNKS_RE = re.compile('[A-Z][^A-Z]*')
 
+
+@functools.lru_cache(maxsize=None)
 def get_handler_name(handler):
-    name_chunks = re.findall('[A-Z][^A-Z]*', handler.__name__)
+    name_chunks = _NAME_CHUNKS_RE.findall(handler.__name__)
     name_chunks.remove('Handler')
     return ' '.join(name_chunks)
 
 
+@functools.lru_cache(maxsize=None)
+def _get_handler_documentation(handler) -> Dict:
+    return {
+        'uri': handler.uri,
+        'name': get_handler_name(handler),
+        'http_method': handler.method,
+        'description': handler.help,
+        'input': _collect_forms_documentation(handler.input_form),
+        'output': _collect_forms_documentation(handler.output_form)
+    }
+
+
+def get_handler_documentation(handler) -> Dict:
+    return copy_docs(_get_handler_documentation(handler))
+
+
 def collect_documentation(handlers: List[BaseHandler]) -> List[Dict]:
-    return [
-        {
-            'uri': handler.uri,
-            'name': get_handler_name(handler),
-            'http_method': handler.method,
-            'description': handler.help,
-            'input': collect_forms_documentation(handler.input_form),
-            'output': collect_forms_documentation(handler.output_form)
-        } for handler in handlers
-    ]
+    return [get_handler_documentation(handler) for handler in handlers]
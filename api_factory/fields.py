@@ -8,6 +8,9 @@ from .exceptions import FieldValidationError
 
 class BaseField(metaclass=abc.ABCMeta):
 
+    # fields are created once per form, slots keep them compact and their attributes fast to access
+    __slots__ = ('required', 'default', 'help', 'key_map', '_doc')
+
     # is a field is required
     required: bool
 
@@ -17,20 +20,32 @@ class BaseField(metaclass=abc.ABCMeta):
     # field doc string
     help: Optional[str]
 
+    # field documentation, built once by the auto docs
+    _doc: Optional[Dict]
+
     def __init__(self, *, required: bool=False, default=None, help: str=None, key_map: str=None):
         self.required = required
         self.default = default
         self.help = help
         self.key_map = key_map
+        self._doc = None
 
     def validate(self, value):
-        if not self.required:
-            value = value if value is not None else self.default
+        # the value is provided in the most cases, so it goes straight to the validation
+        if value is not None:
+            return self.custom_validation(value)
 
-        if value is None:
+        # the default value is used for the optional fields only
+        if self.required or self.default is None:
             return None
 
-        return self.custom_validation(value)
+        return self.custom_validation(self.default)
+
+    def validate_batch(self, values: List) -> List:
+        """ Validates a column of values, the same way as validate does for every single value """
+
+        validate = self.validate
+        return [validate(value) for value in values]
 
     @abc.abstractmethod
     def custom_validation(self, value):
@@ -38,6 +53,7 @@ class BaseField(metaclass=abc.ABCMeta):
 
 
 class StringField(BaseField):
+    __slots__ = ('min_length', 'max_length')
 
     # restrict the value to be larger than min_length
     min_length: Optional[int]
@@ -51,18 +67,51 @@ class StringField(BaseField):
         self.max_length = max_length
 
     def custom_validation(self, value):
-        value = str(value)
+        if type(value) is not str:
+            value = str(value)
 
-        if self.min_length is not None and self.min_length > len(value):
-            raise FieldValidationError('the value is shorter than min allowed length [%s]' % self.min_length)
+        min_length, max_length = self.min_length, self.max_length
 
-        if self.max_length is not None and self.max_length < len(value):
-            raise FieldValidationError('the value is larger than max allowed length [%s]' % self.max_length)
+        if min_length is not None and len(value) < min_length:
+            raise FieldValidationError('the value is shorter than min allowed length [%s]' % min_length)
+
+        if max_length is not None and len(value) > max_length:
+            raise FieldValidationError('the value is larger than max allowed length [%s]' % max_length)
 
         return value
 
+    def validate_batch(self, values: List) -> List:
+        # the inlined checks are the library ones, the subclasses customizing the validation go value by value
+        field_cls = type(self)
+        if (field_cls.custom_validation is not StringField.custom_validation
+                or field_cls.validate is not BaseField.validate):
+            return super(StringField, self).validate_batch(values)
+
+        required, default = self.required, self.default
+        min_length, max_length = self.min_length, self.max_length
+
+        validated = []
+        for value in values:
+            if value is None and not required:
+                value = default
+
+            if value is not None:
+                if type(value) is not str:
+                    value = str(value)
+
+                if min_length is not None and len(value) < min_length:
+                    raise FieldValidationError('the value is shorter than min allowed length [%s]' % min_length)
+
+                if max_length is not None and len(value) > max_length:
+                    raise FieldValidationError('the value is larger than max allowed length [%s]' % max_length)
+
+            validated.append(value)
+
+        return validated
+
 
 class BooleanField(BaseField):
+    __slots__ = ()
 
     def custom_validation(self, value):
         value = bool(value)
@@ -70,6 +119,7 @@ class BooleanField(BaseField):
 
 
 class NumericField(BaseField):
+    __slots__ = ('min_value', 'max_value')
 
     # abstract property to set the expected data type
     dtype = None
@@ -91,24 +141,60 @@ class NumericField(BaseField):
         except ValueError:
             raise FieldValidationError('wrong data type')
 
-        if self.min_value is not None and self.min_value > value:
-            raise FieldValidationError('the value is lower than min allowed value [%s]' % self.min_value)
+        min_value, max_value = self.min_value, self.max_value
 
-        if self.max_value is not None and self.max_value < value:
-            raise FieldValidationError('the value is bigger than max allowed value [%s]' % self.max_value)
+        if min_value is not None and min_value > value:
+            raise FieldValidationError('the value is lower than min allowed value [%s]' % min_value)
+
+        if max_value is not None and max_value < value:
+            raise FieldValidationError('the value is bigger than max allowed value [%s]' % max_value)
 
         return value
 
+    def validate_batch(self, values: List) -> List:
+        # the inlined checks are the library ones, the subclasses customizing the validation go value by value
+        field_cls = type(self)
+        if (field_cls.custom_validation is not NumericField.custom_validation
+                or field_cls.validate is not BaseField.validate):
+            return super(NumericField, self).validate_batch(values)
+
+        required, default, dtype = self.required, self.default, self.dtype
+        min_value, max_value = self.min_value, self.max_value
+
+        validated = []
+        for value in values:
+            if value is None and not required:
+                value = default
+
+            if value is not None:
+                try:
+                    value = dtype(value)
+                except ValueError:
+                    raise FieldValidationError('wrong data type')
+
+                if min_value is not None and min_value > value:
+                    raise FieldValidationError('the value is lower than min allowed value [%s]' % min_value)
+
+                if max_value is not None and max_value < value:
+                    raise FieldValidationError('the value is bigger than max allowed value [%s]' % max_value)
+
+            validated.append(value)
+
+        return validated
+
 
 class FloatField(NumericField):
+    __slots__ = ()
     dtype = float
 
 
 class IntegerField(NumericField):
+    __slots__ = ()
     dtype = int
 
 
 class ListField(BaseField):
+    __slots__ = ('field_type', 'blank', 'valid_values', '_field_type_obj')
 
     # type of the list elements
     field_type: Type[BaseField]
@@ -125,18 +211,26 @@ class ListField(BaseField):
         self.blank = blank
         self.valid_values = valid_values
 
+        # the elements field is stateless, so a single instance validates all the elements
+        self._field_type_obj = field_type() if isinstance(field_type, type) else field_type
+
     def custom_validation(self, values) -> List:
         try:
-            field_type_obj = self.field_type()
-            values = [field_type_obj.validate(val) for val in values]
+            # the elements are validated as a batch, so the numeric and string fields use their fast loops
+            values = self._field_type_obj.validate_batch(values)
         except TypeError:
             raise FieldValidationError('wrong data type')
 
         if not self.blank and not values:
             raise FieldValidationError('the value is blank')
 
-        if self.valid_values is not None:
-            unexpected_values = set(values) - set(self.valid_values)
+        valid_values = self.valid_values
+        if valid_values is not None:
+            # the sets are used as is, the other collections are converted for the constant time lookups
+            if not isinstance(valid_values, (set, frozenset)):
+                valid_values = frozenset(valid_values)
+
+            unexpected_values = {val for val in values if val not in valid_values}
             if unexpected_values:
                 raise FieldValidationError("not allowed values: %s" % unexpected_values)
 
@@ -144,6 +238,8 @@ class ListField(BaseField):
 
 
 class DictField(BaseField):
+    __slots__ = ('field_type', 'blank', '_field_type_obj')
+
     field_type: Type[BaseField]
     blank: bool
 
@@ -152,14 +248,16 @@ class DictField(BaseField):
         self.field_type = field_type
         self.blank = blank
 
+        # the values field is stateless, so a single instance validates all the values
+        self._field_type_obj = field_type() if isinstance(field_type, type) else field_type
+
     def custom_validation(self, values) -> Dict:
 
         if not isinstance(values, dict):
             raise FieldValidationError('wrong data type')
 
         try:
-            field_type_obj = self.field_type()
-            values = {key: field_type_obj.validate(val) for key, val in values.items()}
+            values = dict(zip(values.keys(), self._field_type_obj.validate_batch(list(values.values()))))
         except TypeError:
             raise FieldValidationError('wrong data type')
 
@@ -170,6 +268,7 @@ class DictField(BaseField):
 
 
 class SubformField(BaseField):
+    __slots__ = ('subform',)
 
     def __init__(self, subform, **kwargs):
         super(SubformField, self).__init__(**kwargs)
@@ -180,14 +279,15 @@ class SubformField(BaseField):
 
 
 class DictSubformField(SubformField):
-    pass
+    __slots__ = ()
 
 
 class ListSubformField(SubformField):
-    pass
+    __slots__ = ()
 
 
 class JSONField(BaseField):
+    __slots__ = ()
 
     def custom_validation(self, value):
         try:
@@ -1,16 +1,84 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Callable
 
 from .exceptions import InvalidValueError, RequiredFieldError, ServerError, FieldValidationError
 from .fields import BaseField, SubformField, ListSubformField, DictSubformField
 
 
+def _process_plain_field(field: BaseField, value, key: str):
+    # validate field value
+    try:
+        return field.validate(value)
+    except FieldValidationError as e:
+        raise ServerError('invalid value [%s=%s] %s' % (key, value, str(e)))
+
+
+def _process_subform_field(field: SubformField, value, key: str):
+    if value is None:
+        return None
+    return field.subform.process_form(value)
+
+
+def _process_list_subform_field(field: ListSubformField, value, key: str):
+    if value is None:
+        return []
+    return field.subform.process_many(value)
+
+
+def _process_dict_subform_field(field: DictSubformField, value, key: str):
+    if value is None:
+        return None
+    # the values are processed as a batch, so the subform validates them column by column
+    return dict(zip(value.keys(), field.subform.process_many(list(value.values()))))
+
+
+def get_output_handler(field: BaseField) -> Callable:
+    """ Selects the function processing the field output value, resolved once at the form class creation """
+
+    if isinstance(field, DictSubformField):
+        return _process_dict_subform_field
+    if isinstance(field, ListSubformField):
+        return _process_list_subform_field
+    if isinstance(field, SubformField):
+        return _process_subform_field
+    return _process_plain_field
+
+
+def build_converter(cls) -> Callable:
+    """ Generates a function building the processed form data as a single dict literal """
+
+    namespace = {}
+    items = []
+    for i, (key, field, handler, data_key) in enumerate(
+            zip(cls._keys, cls._field_objs, cls._output_handlers, cls._data_keys)):
+        if handler is _process_plain_field:
+            namespace['validate_%d' % i] = field.validate
+            items.append('%r: validate_%d(get(%r))' % (key, i, data_key))
+        else:
+            namespace['handler_%d' % i] = handler
+            namespace['field_%d' % i] = field
+            items.append('%r: handler_%d(field_%d, get(%r), %r)' % (key, i, i, data_key, key))
+
+    source = 'def convert(output_data):\n    get = output_data.get\n    return {%s}\n' % ', '.join(items)
+    exec(source, namespace)
+    return namespace['convert']
+
+
 class FormsMeta(type):
 
     def __init__(cls, name, bases, attrs):
         super(FormsMeta, cls).__init__(name, bases, attrs)
 
-        # collects all the defined form fields
-        cls.fields = [(key, field) for key, field in attrs.items() if not key.startswith('__')]
+        # collects all the defined form fields in a single pass
+        cls.fields = [(key, field) for key, field in attrs.items() if isinstance(field, BaseField)]
+
+        # precomputes everything the processing needs per field as parallel tuples,
+        # so the processing loops zip only the ones they use
+        cls._keys = tuple(key for key, _ in cls.fields)
+        cls._field_objs = tuple(field for _, field in cls.fields)
+
+        # the base forms are never processed, only the defined forms prepare their own kind of processing
+        if any(isinstance(base, FormsMeta) for base in bases):
+            cls._prepare_processing()
 
 
 class BaseInputForm(metaclass=FormsMeta):
@@ -18,20 +86,24 @@ class BaseInputForm(metaclass=FormsMeta):
     # aggregated all the defined fields
     fields: List[Tuple[str, BaseField]] = None
 
+    @classmethod
+    def _prepare_processing(cls):
+        cls._validators = tuple(field.validate for field in cls._field_objs)
+
     @classmethod
     def process(cls, input_data: Dict) -> Dict:
         processed_data = {}
 
-        for key, field in cls.fields:
+        for key, field, validate in zip(cls._keys, cls._field_objs, cls._validators):
             value = input_data.get(key)
 
-            # validate required fields
+            # validate required fields, the flag is read from the field as the validation does
             if field.required and not value:
                 raise RequiredFieldError(key)
 
             # validate field value
             try:
-                processed_data[key] = field.validate(value)
+                processed_data[key] = validate(value)
             except FieldValidationError as e:
                 raise InvalidValueError(key, value, str(e))
 
@@ -43,6 +115,14 @@ class BaseOutputForm(metaclass=FormsMeta):
     # aggregated all the defined fields
     fields: List[Tuple[str, BaseField]] = None
 
+    @classmethod
+    def _prepare_processing(cls):
+        cls._output_handlers = tuple(get_output_handler(field) for field in cls._field_objs)
+        cls._data_keys = tuple(field.key_map or key for key, field in cls.fields)
+
+        # the output processing of a single row, compiled once per form
+        cls._convert = staticmethod(build_converter(cls))
+
     @classmethod
     def process(cls, output_data):
         """ Processing different types of response: dict response and list of dicts """
@@ -50,41 +130,43 @@ class BaseOutputForm(metaclass=FormsMeta):
         if isinstance(output_data, dict):
             return cls.process_form(output_data)
         elif isinstance(output_data, (list, tuple)):
-            return [cls.process_form(data) for data in output_data]
+            return cls.process_many(output_data)
 
     @classmethod
-    def process_form(cls, output_data: Dict) -> Dict:
-        processed_data = {}
+    def process_many(cls, rows: List[Dict]) -> List[Dict]:
+        """ Processing a list of rows column by column, so every field validates all its values at once """
 
-        for key, field in cls.fields:
-            if field.key_map:
-                value = output_data.get(field.key_map)
-            else:
-                value = output_data.get(key)
-
-            if isinstance(field, DictSubformField):
-                if value is None:
-                    processed_data[key] = None
-                else:
-                    processed_data[key] = {k: field.subform.process_form(v) for k, v in value.items()}
-
-            elif isinstance(field, ListSubformField):
-                if value is None:
-                    processed_data[key] = []
-                else:
-                    processed_data[key] = [field.subform.process_form(row) for row in value]
-
-            elif isinstance(field, SubformField):
-                if value is None:
-                    processed_data[key] = None
-                else:
-                    processed_data[key] = field.subform.process_form(value)
+        # the rows are walked once per field, so one-shot iterables are materialized first
+        if type(rows) is not list:
+            rows = list(rows)
 
-            else:
-                # validate field value
+        processed_rows = [{} for _ in rows]
+
+        for key, field, handler, data_key in zip(cls._keys, cls._field_objs, cls._output_handlers, cls._data_keys):
+            values = [row.get(data_key) for row in rows]
+
+            if handler is _process_plain_field:
                 try:
-                    processed_data[key] = field.validate(value)
-                except FieldValidationError as e:
-                    raise ServerError('invalid value [%s=%s] %s' % (key, value, str(e)))
+                    values = field.validate_batch(values)
+                except FieldValidationError:
+                    # find the wrong value to report it the same way as process_form does
+                    for value in values:
+                        handler(field, value, key)
+                    raise
+            else:
+                values = [handler(field, value, key) for value in values]
 
-        return processed_data
+            for processed_data, value in zip(processed_rows, values):
+                processed_data[key] = value
+
+        return processed_rows
+
+    @classmethod
+    def process_form(cls, output_data: Dict) -> Dict:
+        try:
+            return cls._convert(output_data)
+        except FieldValidationError:
+            # the generated function doesn't know the wrong value, so the fields are processed one by one to report it
+            for key, field, handler, data_key in zip(cls._keys, cls._field_objs, cls._output_handlers, cls._data_keys):
+                handler(field, output_data.get(data_key), key)
+            raise
@@ -1,25 +1,96 @@
 import os
-import jwt
+import re
 import json
-import boto3
+import time
 import base64
+import hashlib
 import logging
+import functools
 
-from typing import Type, Dict, Optional
-from collections import namedtuple
-from cryptography.x509 import load_pem_x509_certificate
-from cryptography.hazmat.backends import default_backend
+from typing import Type, Dict, Optional, Tuple, Callable, Any
 
 from .forms import BaseInputForm, BaseOutputForm
-from .exceptions import PermissionsError, ClientError, ServerError, AuthenticationError
+from .exceptions import PermissionsError, ClientError, AuthenticationError
 from .logger import log_handler
 
+try:
+    # optional faster replacement of the standard json module
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger('api-factory')
 logger.setLevel(logging.DEBUG)
 logger.addHandler(log_handler)
 
 
+# security headers added to every response
+SECURITY_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Strict-Transport-Security': 'max-age=63072000; includeSubdomains; preload',
+    'Content-Security-Policy': "default-src 'none'; img-src 'self'; script-src 'self'; style-src 'self'; object-src 'none'",
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'same-origin',
+}
+
+
+# orjson serializes the datetimes and dataclasses natively, passing them through makes them rejected as json does
+_ORJSON_DUMPS_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                         if orjson is not None else None)
+
+
+def json_dumps(data) -> str:
+    """ Serializes the data to JSON string, using orjson if it is installed.
+    Unlike json, orjson writes NaN and Infinity floats as null and serializes UUID values.
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=_ORJSON_DUMPS_OPTIONS).decode()
+        except TypeError:
+            # orjson is stricter than json (e.g. on integers over 64 bits), so fall back to the standard json
+            pass
+
+    return json.dumps(data)
+
+
+# digit runs that may be integers over 64 bits, which orjson decodes as floats losing the precision
+_LONG_NUMBER_RE = re.compile('[0-9]{19}')
+_LONG_NUMBER_BYTES_RE = re.compile(b'[0-9]{19}')
+
+
+def json_loads(data):
+    """ Deserializes JSON string or bytes, using orjson if it is installed """
+
+    if orjson is not None:
+        long_number_re = _LONG_NUMBER_BYTES_RE if isinstance(data, bytes) else _LONG_NUMBER_RE
+        if long_number_re.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # orjson rejects some inputs json accepts (NaN, Infinity, lone surrogates), so fall back to json
+                pass
+
+    # the standard json keeps the big integers exact
+    return json.loads(data)
+
+
+def get_query_input(event: Dict) -> Dict:
+    """ Input data of GET requests """
+
+    return event.get('queryStringParameters') or {}
+
+
+def get_body_input(event: Dict) -> Dict:
+    """ Input data of the requests with a JSON body """
+
+    body = event.get('body')
+    return json_loads(body) if body else {}
+
+
 def error_response(status_code, reason):
     """ Defines an error response structure """
 
@@ -39,11 +110,137 @@ def success_response(body):
     }
 
 
-RequestingUser = namedtuple('RequestingUser', ['email'])
+# the expected errors: the response status code and how the error is logged
+CLIENT_ERRORS = {
+    PermissionsError: (403, logging.WARNING, 'permissions is not valid'),
+    AuthenticationError: (401, logging.ERROR, 'auth error'),
+    ClientError: (400, logging.DEBUG, 'client error'),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_client_error(error_cls: Type[Exception]) -> Optional[Tuple[int, int, str]]:
+    """ Finds the closest expected error in the MRO, so the subclasses are handled like their parents """
+
+    for cls in error_cls.__mro__:
+        if cls in CLIENT_ERRORS:
+            return CLIENT_ERRORS[cls]
+
+
+class RequestingUser:
+    """ Authenticated user info, created for every authenticated request """
+
+    __slots__ = ('email',)
+
+    def __init__(self, email: str):
+        self.email = email
+
+    # compared and shown by the email, as the namedtuple used before
+    def __eq__(self, other):
+        if not isinstance(other, RequestingUser):
+            return NotImplemented
+        return self.email == other.email
+
+    def __hash__(self):
+        return hash(self.email)
+
+    def __repr__(self):
+        return 'RequestingUser(email=%r)' % self.email
+
+
+class TTLCache:
+    """ In-memory cache keeping the values for a limited time. Lives as long as the Lambda container. """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._values = {}
+
+    def get(self, key):
+        cached = self._values.get(key)
+        if cached is None:
+            return None
+
+        value, expires_at = cached
+        if expires_at <= time.time():
+            self._values.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key, value, expires_at: float=None):
+        # drop the oldest value if the cache is full, a cached key is replaced in place
+        if key not in self._values and len(self._values) >= self.maxsize:
+            self._values.pop(next(iter(self._values)))
+
+        # the value may expire earlier than the cache ttl
+        ttl_expires_at = time.time() + self.ttl
+        if expires_at is None or expires_at > ttl_expires_at:
+            expires_at = ttl_expires_at
+
+        self._values[key] = (value, expires_at)
+
+    def clear(self):
+        self._values.clear()
+
+
+def get_token_key(token: str) -> bytes:
+    """ Tokens are cached by their hashes, not in the raw form.
+    The hash must stay cryptographic: a crafted token colliding with a cached one would pass unverified.
+    """
+
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+# verified JWT payloads, so a token reused by the client skips the signature verification
+jwt_cache = TTLCache(maxsize=10000, ttl=30)
+
+# granted permissions, so a repeated action of the user skips the authorizer call
+permissions_cache = TTLCache(maxsize=2048, ttl=60)
+
+
+@functools.lru_cache(maxsize=1)
+def get_jwt_settings() -> Tuple[Any, str]:
+    """ Loads the JWT settings once per process, with the first authenticated request """
+
+    # cryptography is slow to import, so it is loaded only by the handlers using it
+    from cryptography.x509 import load_pem_x509_certificate
+    from cryptography.hazmat.backends import default_backend
+
+    # certification key encoded into base64 and a public key out from it (used to verify the JWT)
+    cert_key = base64.b64decode(os.environ['JWT_CERT_KEY'].encode())
+    public_key = load_pem_x509_certificate(cert_key, default_backend()).public_key()
+
+    # Auth0 audience (used to verify the JWT)
+    audience = os.environ['AUDIENCE']
+
+    return public_key, audience
+
+
+@functools.lru_cache(maxsize=1)
+def get_jwt_decoder():
+    """ Creates the JWT decoder once per process, the algorithms are restricted per decode call """
+
+    import jwt
+
+    return jwt.PyJWT()
+
+
+@functools.lru_cache(maxsize=1)
+def get_lambda_client():
+    """ Creates the client to call lambda directly, once per process """
+
+    # boto3 is slow to import, so it is loaded only by the handlers calling other lambdas
+    import boto3
+
+    return boto3.client('lambda')
 
 
 class LambdaHandler:
-    """ Describes the common pattern of an API methods. Designed specifically for AWS Lambda. """
+    """ Describes the common pattern of an API methods. Designed specifically for AWS Lambda.
+    The method, input_form and output_form are resolved at the class creation, so they must not be changed
+    on the created class (define a subclass instead).
+    """
 
     # event data
     event: Optional[Dict] = None
@@ -63,27 +260,40 @@ class LambdaHandler:
     # HTTP method name: GET, POST, etc
     method = None
 
+    # input data getter and processing functions of the defined forms, resolved once per handler class
+    # from the method and the forms, so changing those later doesn't affect the requests processing
+    _get_input_data: Callable = staticmethod(get_body_input)
+    _process_input: Optional[Callable] = None
+    _process_output: Optional[Callable] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super(LambdaHandler, cls).__init_subclass__(**kwargs)
+
+        cls._get_input_data = staticmethod(get_query_input if cls.method == 'GET' else get_body_input)
+        cls._process_input = cls.input_form.process if cls.input_form is not None else None
+        cls._process_output = cls.output_form.process if cls.output_form is not None else None
+
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def get_lambda_handler(cls):
-        """ Creates an entry point for AWS Lambda function """
+        """ Creates an entry point for AWS Lambda function, once per handler class.
+        The handler instance is created once and serves all the requests of the Lambda container,
+        so the request state must be (re)set per request, not kept on the instance between requests.
+        """
+
+        instance = cls()
 
         def _handler(event, context):
-            response = cls().handle_request(event)
+            response = instance.handle_request(event)
 
-            headers = event.get('headers') or {}
-            headers['Access-Control-Allow-Origin'] = '*'
-            headers['Strict-Transport-Security'] = 'max-age=63072000; includeSubdomains; preload'
-            headers['Content-Security-Policy'] = "default-src 'none'; img-src 'self'; script-src 'self'; style-src 'self'; object-src 'none'"
-            headers['X-Content-Type-Options'] = 'nosniff'
-            headers['X-Frame-Options'] = 'DENY'
-            headers['X-XSS-Protection'] = '1; mode=block'
-            headers['Referrer-Policy'] = 'same-origin'
+            # the security headers override the same request headers
+            headers = {**(event.get('headers') or {}), **SECURITY_HEADERS}
 
             return {
                 'isBase64Encoded': False,
                 'statusCode': 200,
                 'headers': headers,
-                'body': json.dumps(response)
+                'body': json_dumps(response)
             }
 
         return _handler
@@ -91,21 +301,20 @@ class LambdaHandler:
     def process_method(self, data: Dict):
         """ Process the input data according to the custom method """
 
-        if self.method == 'GET':
-            self.input_data = data.get('queryStringParameters') or {}
-        else:
-            self.input_data = json.loads(data.get('body')) if data.get('body') else {}
+        self.input_data = self._get_input_data(data)
 
         # process the request data if input form added
-        if self.input_form is not None:
-            self.input_data = self.input_form.process(self.input_data)
+        process_input = self._process_input
+        if process_input is not None:
+            self.input_data = process_input(self.input_data)
 
         # run custom method handler
         response_data = self.handler()
 
         # process the response data if output form added
-        if self.output_form is not None:
-            response_data = self.output_form.process(response_data)
+        process_output = self._process_output
+        if process_output is not None:
+            response_data = process_output(response_data)
 
         return response_data
 
@@ -118,23 +327,21 @@ class LambdaHandler:
             response_data = self.process_method(event)
             return success_response(response_data)
 
-        except PermissionsError as e:
-            logger.warning({'message': 'permissions is not valid', 'reason': e})
-            return error_response(403, str(e))
-
-        except AuthenticationError as e:
-            logger.error({'message': 'auth error', 'reason': e})
-            return error_response(401, str(e))
+        except Exception as e:
+            client_error = get_client_error(type(e))
 
-        except ClientError as e:
-            logger.debug({'message': 'client error', 'reason': e})
-            return error_response(400, str(e))
+            # if any unexpected error raised, treat it as a server error
+            # all expected errors should be processed accordingly to their nature
+            if client_error is None:
+                logger.exception({'message': 'server error', 'reason': e}, exc_info=True)
+                return error_response(500, 'server error')
 
-        # if any unexpected error raised, treat it as a server error
-        # all expected errors should be processed accordingly to their nature
-        except (ServerError, Exception) as e:
-            logger.exception({'message': 'server error', 'reason': e}, exc_info=True)
-            return error_response(500, 'server error')
+            # the error is stringified once for both the log and the response
+            status_code, log_level, message = client_error
+            reason = str(e)
+            if logger.isEnabledFor(log_level):
+                logger.log(log_level, {'message': message, 'reason': reason})
+            return error_response(status_code, reason)
 
     def handler(self) -> Dict:
         raise NotImplementedError()
@@ -149,16 +356,10 @@ class Auth0Authenticator:
     # requesting user info if user is authenticated
     requesting_user: Optional[RequestingUser] = None
 
-    def __init__(self, *args, **kwargs):
-        super(Auth0Authenticator, self).__init__(*args, **kwargs)
-
-        # certification key encoded into base64 (used to verify the JWT)
-        self.JWT_CERT_KEY = base64.b64decode(os.environ['JWT_CERT_KEY'].encode())
-
-        # Auth0 audience (used to verify the JWT)
-        self.JWT_AUDIENCE = os.environ['AUDIENCE']
-
     def process_method(self, data: Dict):
+        # the handler instance is reused, so the previous request user must not leak
+        self.requesting_user = None
+
         # process the authentication if the method requires it
         if self.authentication:
             self.setup_requesting_user(data.get('headers') or {})
@@ -176,24 +377,38 @@ class Auth0Authenticator:
             logger.warning({'message': 'JWT is missing', 'reason': 'missing "Authorization" header'})
             raise AuthenticationError()
 
-        # XXX: temporary
-        token = token.replace('Bearer ', '')
+        # only the scheme prefix is stripped, the token itself is left untouched
+        if token.startswith('Bearer '):
+            token = token[len('Bearer '):]
 
-        # TODO: add more meaningful logging to catch suspicious requests
-        try:
-            # get a public key out from certificate key
-            public_key = load_pem_x509_certificate(self.JWT_CERT_KEY, default_backend()).public_key()
+        # PyJWT is loaded with the first authenticated request, the later imports are taken from sys.modules
+        import jwt
 
-            # verify jwt and decode payload
-            token_payload = jwt.decode(token, public_key, verify=True, algorithms=['RS256'], audience=self.JWT_AUDIENCE)
+        # verified tokens are cached, only the failed or new ones go through the signature verification
+        token_key = get_token_key(token)
+        token_payload = jwt_cache.get(token_key)
+        if token_payload is None:
+            # the settings are process-constant, so they are taken from the cache after the first request,
+            # a broken certificate fails the request with a server error
+            public_key, audience = get_jwt_settings()
 
-        except jwt.InvalidSignatureError:
-            logger.warning({'message': 'attempt to decode the wrong JWT'})
-            raise AuthenticationError()
+            # TODO: add more meaningful logging to catch suspicious requests
+            try:
+                # verify jwt and decode payload, the expiration is required so the cached payloads expire with the JWT
+                # (require_exp is the PyJWT 1.x option, require is the PyJWT 2.x one)
+                token_payload = get_jwt_decoder().decode(token, public_key, algorithms=['RS256'], audience=audience,
+                                                         options={'require_exp': True, 'require': ['exp']})
 
-        except jwt.PyJWTError as e:
-            logger.warning({'message': 'error while decoding the JWT', 'reason': e})
-            raise AuthenticationError()
+            except jwt.InvalidSignatureError:
+                logger.warning({'message': 'attempt to decode the wrong JWT'})
+                raise AuthenticationError()
+
+            except jwt.PyJWTError as e:
+                logger.warning({'message': 'error while decoding the JWT', 'reason': e})
+                raise AuthenticationError()
+
+            # the payload is never kept longer than the token is valid, so the cache hits need no expiration check
+            jwt_cache.set(token_key, token_payload, expires_at=token_payload['exp'])
 
         user_email = token_payload.get('email')
         if not user_email:
@@ -205,31 +420,37 @@ class Auth0Authenticator:
             logger.warning({'message': 'user email is not verified'})
             raise AuthenticationError()
 
-        # TODO: validate jwt expiration
         # TODO: validate jwt issuer
 
         self.requesting_user = RequestingUser(user_email)
 
 
-# helper class, combines common functional
-BaseHandler = type('BaseHandler', (Auth0Authenticator, LambdaHandler), {})
+class BaseHandler(Auth0Authenticator, LambdaHandler):
+    """ Helper class, combines common functional """
 
 
 class AuthHandler(BaseHandler):
 
-    # client to call lambda directly
-    lambda_client = boto3.client('lambda')
+    @property
+    def lambda_client(self):
+        """ Client to call lambda directly """
+
+        return get_lambda_client()
 
     def authorize(self, **payload):
-        log_msg = dict(payload)
-        response = self.call_lambda(name=os.environ['AUTHORIZER_FUNC'], payload=payload)
-        if response['status'] == 'FAIL' or not response['body']['access_is_allowed']:
-            log_msg.update({'message': 'permissions is not valid', 'user_email': self.requesting_user.email})
-            logger.warning(log_msg)
-            raise PermissionsError()
+        # only the granted permissions are cached, the denied ones are always checked by the authorizer
+        cache_key = (self.requesting_user.email, json.dumps(payload, sort_keys=True))
+        if permissions_cache.get(cache_key) is None:
+            response = self.call_lambda(name=os.environ['AUTHORIZER_FUNC'], payload=payload)
+            if response['status'] == 'FAIL' or not response['body']['access_is_allowed']:
+                logger.warning(dict(payload, message='permissions is not valid', user_email=self.requesting_user.email))
+                raise PermissionsError()
 
-        log_msg.update({'message': 'permissions is valid', 'user_email': self.requesting_user.email})
-        logger.info(log_msg)
+            permissions_cache.set(cache_key, True)
+
+        # the log message is built only if it is going to be logged
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(dict(payload, message='permissions is valid', user_email=self.requesting_user.email))
 
     def call_lambda(self, name: str, payload: Dict=None):
         event = {
@@ -238,6 +459,8 @@ class AuthHandler(BaseHandler):
         }
 
         response = self.lambda_client.invoke(
-            FunctionName=name, InvocationType='RequestResponse', Payload=json.dumps(event))
-        response = json.loads(response['Payload'].read())
-        return json.loads(response['body'])
+            FunctionName=name, InvocationType='RequestResponse', Payload=json_dumps(event))
+
+        # the payload bytes are decoded as is, without converting them to a string first
+        response = json_loads(response['Payload'].read())
+        return json_loads(response['body'])
@@ -3,7 +3,7 @@ from unittest import TestCase
 from ..handlers import BaseHandler
 from ..forms import BaseInputForm, BaseOutputForm
 from ..fields import StringField, BooleanField, ListField, SubformField
-from ..auto_docs import collect_documentation
+from ..auto_docs import collect_documentation, collect_forms_documentation
 
 
 class TestAutoDocs(TestCase):
@@ -86,3 +86,21 @@ class TestAutoDocs(TestCase):
                                                               'type': 'subform'},
                                                   'required': False}}}
         self.assertDictEqual(docs[0], expected_docs)
+
+    def test_forms_docs_cache(self):
+        class TestForm(BaseOutputForm):
+            email = StringField(help='User email')
+
+        class TestHandler(BaseHandler):
+            uri = 'users/email'
+            method = 'GET'
+            output_form = TestForm
+
+        docs = collect_forms_documentation(TestForm)
+        self.assertDictEqual(collect_forms_documentation(TestForm), docs)
+
+        # the cached docs are copied, so changing the returned ones doesn't affect the later calls
+        docs['email']['details'].clear()
+        collect_documentation([TestHandler])[0]['output'].pop('email')
+        self.assertEqual(collect_forms_documentation(TestForm)['email']['details']['type'], 'str')
+        self.assertIn('email', collect_documentation([TestHandler])[0]['output'])
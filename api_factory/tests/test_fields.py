@@ -4,6 +4,34 @@ from ..fields import StringField, FloatField, IntegerField, ListField, BooleanFi
 from ..exceptions import FieldValidationError
 
 
+class EmailField(StringField):
+    __slots__ = ()
+
+    def custom_validation(self, value):
+        value = super(EmailField, self).custom_validation(value)
+        if '@' not in value:
+            raise FieldValidationError('not an email')
+        return value
+
+
+class CodeField(StringField):
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        super(CodeField, self).__init__(**kwargs)
+        self.min_length = 3
+
+
+class EvenField(IntegerField):
+    __slots__ = ()
+
+    def validate(self, value):
+        value = super(EvenField, self).validate(value)
+        if value is not None and value % 2:
+            raise FieldValidationError('not an even number')
+        return value
+
+
 class TestFields(unittest.TestCase):
 
     def assert_validation_error(self, field, value):
@@ -33,6 +61,15 @@ class TestFields(unittest.TestCase):
         self.assert_validation_error(field, '123456')
         self.assertEqual(field.validate('123'), '123')
         self.assertEqual(field.validate('12345'), '12345')
+        self.assertEqual(field.validate(123), '123')
+
+        field = StringField(max_length=2)
+        self.assert_validation_error(field, '123')
+        self.assertEqual(field.validate(''), '')
+
+        field = StringField(min_length=2)
+        self.assert_validation_error(field, '1')
+        self.assertEqual(field.validate('1' * 100), '1' * 100)
 
     def test_boolean_field(self):
         field = BooleanField()
@@ -75,6 +112,10 @@ class TestFields(unittest.TestCase):
         self.assert_validation_error(field, ['1q'])
         self.assertEqual(field.validate(['1', '1.1', 2, 3.3]), [1, 1.1, 2, 3.3])
 
+        field = ListField(IntegerField(min_value=2))
+        self.assert_validation_error(field, [1, 2])
+        self.assertEqual(field.validate(['2', 3]), [2, 3])
+
     def test_dict_field(self):
         field = DictField(StringField)
         self.assert_validation_error(field, 123)
@@ -93,3 +134,55 @@ class TestFields(unittest.TestCase):
         self.assert_validation_error(field, ['c'])
         self.assert_validation_error(field, ['a', 'c'])
         self.assertEqual(field.validate(['a', 'b']), ['a', 'b'])
+
+        # the valid values changed after the field creation are respected
+        field = ListField(IntegerField, valid_values=[1])
+        field.valid_values = [1, 2]
+        self.assertEqual(field.validate([2]), [2])
+        field.valid_values = {1}
+        self.assert_validation_error(field, [2])
+
+    def test_validate_batch(self):
+        field = StringField(default='qwe', max_length=3)
+        self.assertEqual(field.validate_batch(['a', None, 12]), ['a', 'qwe', '12'])
+        with self.assertRaises(FieldValidationError):
+            field.validate_batch(['a', '1234'])
+
+        field = IntegerField(min_value=1, required=True)
+        self.assertEqual(field.validate_batch(['1', None, 2.5]), [1, None, 2])
+        with self.assertRaises(FieldValidationError):
+            field.validate_batch([1, 'qwe'])
+        with self.assertRaises(FieldValidationError):
+            field.validate_batch([1, 0])
+
+        field = BooleanField(default=True)
+        self.assertEqual(field.validate_batch([0, None]), [False, True])
+
+    def test_custom_fields_batch(self):
+        # the subclasses customizing the validation are validated value by value
+        self.assertEqual(EmailField().validate_batch(['qwe@gmail.com', None]), ['qwe@gmail.com', None])
+        with self.assertRaisesRegex(FieldValidationError, 'not an email'):
+            EmailField().validate_batch(['qwe@gmail.com', 'nope'])
+
+        self.assertEqual(EvenField().validate_batch(['2', 4]), [2, 4])
+        with self.assertRaisesRegex(FieldValidationError, 'not an even number'):
+            EvenField().validate_batch([2, 1])
+
+    def test_custom_element_fields(self):
+        self.assertEqual(ListField(EmailField).validate(['qwe@gmail.com']), ['qwe@gmail.com'])
+        self.assert_validation_error(ListField(EmailField), ['nope'])
+        self.assert_validation_error(ListField(EvenField), [1])
+        self.assert_validation_error(DictField(EmailField), {'email': 'nope'})
+        self.assert_validation_error(DictField(EvenField), {'number': 1})
+
+    def test_changed_length_bounds(self):
+        # the bounds set after the field creation are respected
+        self.assert_validation_error(CodeField(), 'ab')
+        with self.assertRaises(FieldValidationError):
+            CodeField().validate_batch(['abc', 'ab'])
+
+        field = StringField()
+        field.max_length = 2
+        self.assert_validation_error(field, 'abc')
+        with self.assertRaises(FieldValidationError):
+            field.validate_batch(['abc'])
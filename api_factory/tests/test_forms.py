@@ -2,153 +2,176 @@ import unittest
 
 from ..forms import BaseInputForm, BaseOutputForm
 from ..fields import StringField, IntegerField, SubformField, DictSubformField, ListSubformField
-from ..exceptions import RequiredFieldError, InvalidValueError, ServerError
+from ..exceptions import RequiredFieldError, InvalidValueError, ServerError, FieldValidationError
 
 
-class TestInputForms(unittest.TestCase):
-
-    def test_required_fields(self):
-
-        class TestForm(BaseInputForm):
-            email = StringField(required=True)
-            age = IntegerField()
-
-        with self.assertRaises(RequiredFieldError):
-            TestForm.process({'age': 2})
+class RequiredFieldsForm(BaseInputForm):
+    email = StringField(required=True)
+    age = IntegerField()
 
-        with self.assertRaises(RequiredFieldError):
-                TestForm.process({})
-
-        input_data = TestForm.process({'email': 'test@gmail.com'})
-        expected_data = {'email': 'test@gmail.com', 'age': None}
-        self.assertDictEqual(input_data, expected_data)
 
-        input_data = TestForm.process({'email': 'test@gmail.com', 'age': -1})
-        expected_data = {'email': 'test@gmail.com', 'age': -1}
-        self.assertDictEqual(input_data, expected_data)
+class LimitedInputForm(BaseInputForm):
+    email = StringField(min_length=5)
+    age = IntegerField(min_value=2)
 
-    def test_input_errors(self):
 
-        class TestForm(BaseInputForm):
-            email = StringField(min_length=5)
-            age = IntegerField(min_value=2)
+class LimitedOutputForm(BaseOutputForm):
+    email = StringField(min_length=5)
+    age = IntegerField(min_value=2)
 
-        with self.assertRaisesRegex(InvalidValueError, 'email=1234'):
-            TestForm.process({'email': '1234'})
 
-        with self.assertRaisesRegex(InvalidValueError, 'age=1'):
-            TestForm.process({'email': '12345', 'age': 1})
+class EmailField(StringField):
+    __slots__ = ()
 
-        with self.assertRaisesRegex(InvalidValueError, 'age=qwe'):
-            TestForm.process({'email': '12345', 'age': 'qwe'})
+    def custom_validation(self, value):
+        if '@' not in value:
+            raise FieldValidationError('not an email')
+        return value
 
-        TestForm.process({'email': '12345', 'age': 2})
-        TestForm.process({'age': 2})
-        TestForm.process({'email': '12345'})
 
-    def test_forms_inheritance(self):
-        pass
+class CustomFieldForm(BaseOutputForm):
+    email = EmailField()
 
 
-class TestOutputForms(unittest.TestCase):
+class EmailSubform(BaseOutputForm):
+    email = StringField()
 
-    def test_key_map(self):
-        class TestForm(BaseOutputForm):
-            email = StringField(key_map='user_email')
-            age = IntegerField()
 
-        output_data = TestForm.process({'age': 2, 'user_email': 'qwe@gmail.com'})
-        expected_data = {'age': 2, 'email': 'qwe@gmail.com'}
-        self.assertDictEqual(output_data, expected_data)
+class UserForm(BaseOutputForm):
+    user = SubformField(EmailSubform)
 
-    def test_output_formats(self):
 
-        class TestForm(BaseOutputForm):
-            email = StringField()
+class UsersDictForm(BaseOutputForm):
+    users = DictSubformField(EmailSubform)
 
-        output_data = TestForm.process({'email': 'qwe@gmail.com'})
-        expected_data = {'email': 'qwe@gmail.com'}
-        self.assertEqual(output_data, expected_data)
 
-        output_data = TestForm.process([{'email': 'qwe@gmail.com'}, {'email': 'asd@gmail.com'}])
-        expected_data = [{'email': 'qwe@gmail.com'}, {'email': 'asd@gmail.com'}]
-        self.assertEqual(output_data, expected_data)
+class UsersListForm(BaseOutputForm):
+    users = ListSubformField(EmailSubform)
 
-    def test_output_errors(self):
 
-        class TestForm(BaseOutputForm):
-            email = StringField(min_length=5)
-            age = IntegerField(min_value=2)
+# data passing the limited forms
+VALID_LIMITED_DATA = [{'email': '12345', 'age': 2}, {'age': 2}, {'email': '12345'}]
 
-        with self.assertRaises(ServerError):
-            TestForm.process({'email': '1234'})
+# data failing the limited forms: (data, the reported value)
+INVALID_LIMITED_DATA = [
+    ({'email': '1234'}, 'email=1234'),
+    ({'email': '12345', 'age': 1}, 'age=1'),
+    ({'email': '12345', 'age': 'qwe'}, 'age=qwe'),
+]
 
-        with self.assertRaises(ServerError):
-            TestForm.process({'email': '12345', 'age': 1})
 
-        with self.assertRaises(ServerError):
-            TestForm.process({'email': '12345', 'age': 'qwe'})
+class TestInputForms(unittest.TestCase):
 
-        TestForm.process({'email': '12345', 'age': 2})
-        TestForm.process({'age': 2})
-        TestForm.process({'email': '12345'})
+    def test_required_fields(self):
+        for input_data in [{'age': 2}, {}]:
+            with self.subTest(input_data=input_data), self.assertRaises(RequiredFieldError):
+                RequiredFieldsForm.process(input_data)
+
+        for input_data, expected_data in [
+            ({'email': 'test@gmail.com'}, {'email': 'test@gmail.com', 'age': None}),
+            ({'email': 'test@gmail.com', 'age': -1}, {'email': 'test@gmail.com', 'age': -1}),
+        ]:
+            with self.subTest(input_data=input_data):
+                self.assertDictEqual(RequiredFieldsForm.process(input_data), expected_data)
+
+    def test_changed_required_flag(self):
+        class TestForm(BaseInputForm):
+            email = StringField()
 
-    def test_subform_field(self):
+        TestForm.email.required = True
+        with self.assertRaises(RequiredFieldError):
+            TestForm.process({})
 
-        class TestSuborm(BaseOutputForm):
-            email = StringField()
+    def test_input_errors(self):
+        for input_data, reported_value in INVALID_LIMITED_DATA:
+            with self.subTest(input_data=input_data), self.assertRaisesRegex(InvalidValueError, reported_value):
+                LimitedInputForm.process(input_data)
 
-        class TestForm(BaseOutputForm):
-            user = SubformField(TestSuborm)
+        for input_data in VALID_LIMITED_DATA:
+            with self.subTest(input_data=input_data):
+                LimitedInputForm.process(input_data)
 
-        output_data = TestForm.process({'user': {'email': 'qwe@gmail.com'}})
-        expected_data = {'user': {'email': 'qwe@gmail.com'}}
-        self.assertDictEqual(output_data, expected_data)
+    def test_fields_collection(self):
+        class TestForm(RequiredFieldsForm):
+            nickname = StringField()
+            max_age = 100
 
-        output_data = TestForm.process({'user': {}})
-        expected_data = {'user': {'email': None}}
-        self.assertDictEqual(output_data, expected_data)
+            def describe(self):
+                pass
 
-        output_data = TestForm.process({'user': None})
-        expected_data = {'user': None}
-        self.assertDictEqual(output_data, expected_data)
+        self.assertEqual([key for key, _ in TestForm.fields], ['nickname'])
+        self.assertEqual(TestForm.process({'nickname': 'qwe'}), {'nickname': 'qwe'})
 
-    def test_dict_subform_field(self):
 
-        class TestSuborm(BaseOutputForm):
-            email = StringField()
+class TestOutputForms(unittest.TestCase):
 
+    def test_key_map(self):
         class TestForm(BaseOutputForm):
-            users = DictSubformField(TestSuborm)
+            email = StringField(key_map='user_email')
+            age = IntegerField()
 
-        output_data = TestForm.process({'users': {'Mike': {'email': 'qwe@gmail.com'}}})
-        expected_data = {'users': {'Mike': {'email': 'qwe@gmail.com'}}}
+        output_data = TestForm.process({'age': 2, 'user_email': 'qwe@gmail.com'})
+        expected_data = {'age': 2, 'email': 'qwe@gmail.com'}
         self.assertDictEqual(output_data, expected_data)
 
-        output_data = TestForm.process({'users': {}})
-        expected_data = {'users': {}}
-        self.assertDictEqual(output_data, expected_data)
+        # the mapped keys end up in the generated code, so they must be quoted properly
+        class QuotedKeyForm(BaseOutputForm):
+            email = StringField(key_map='user\'s "email"\n')
 
-        output_data = TestForm.process({'users': None})
-        expected_data = {'users': None}
-        self.assertDictEqual(output_data, expected_data)
+        output_data = QuotedKeyForm.process({'user\'s "email"\n': 'qwe@gmail.com'})
+        self.assertDictEqual(output_data, {'email': 'qwe@gmail.com'})
 
-    def test_list_subform_field(self):
+    def test_output_formats(self):
 
-        class TestSuborm(BaseOutputForm):
+        class TestForm(BaseOutputForm):
             email = StringField()
 
-        class TestForm(BaseOutputForm):
-            users = ListSubformField(TestSuborm)
+        output_data = TestForm.process({'email': 'qwe@gmail.com'})
+        expected_data = {'email': 'qwe@gmail.com'}
+        self.assertEqual(output_data, expected_data)
 
-        output_data = TestForm.process({'users': [{'email': 'qwe@gmail.com'}]})
-        expected_data = {'users': [{'email': 'qwe@gmail.com'}]}
-        self.assertDictEqual(output_data, expected_data)
+        output_data = TestForm.process([{'email': 'qwe@gmail.com'}, {'email': 'asd@gmail.com'}])
+        expected_data = [{'email': 'qwe@gmail.com'}, {'email': 'asd@gmail.com'}]
+        self.assertEqual(output_data, expected_data)
 
-        output_data = TestForm.process({'users': []})
-        expected_data = {'users': []}
-        self.assertDictEqual(output_data, expected_data)
+        output_data = TestForm.process([])
+        self.assertEqual(output_data, [])
 
-        output_data = TestForm.process({'users': None})
-        expected_data = {'users': []}
-        self.assertDictEqual(output_data, expected_data)
+    def test_output_errors(self):
+        for output_data, reported_value in INVALID_LIMITED_DATA:
+            with self.subTest(output_data=output_data), self.assertRaisesRegex(ServerError, reported_value):
+                LimitedOutputForm.process(output_data)
+
+        with self.assertRaisesRegex(ServerError, 'age=1'):
+            LimitedOutputForm.process([{'email': '12345', 'age': 2}, {'email': '12345', 'age': 1}])
+
+        for output_data in VALID_LIMITED_DATA:
+            with self.subTest(output_data=output_data):
+                LimitedOutputForm.process(output_data)
+
+        # the custom field validation applies to the list responses as well
+        for output_data in [{'email': 'nope'}, [{'email': 'qwe@gmail.com'}, {'email': 'nope'}]]:
+            with self.subTest(output_data=output_data), self.assertRaisesRegex(ServerError, 'not an email'):
+                CustomFieldForm.process(output_data)
+
+    def test_subform_fields(self):
+        for form, output_data, expected_data in [
+            (UserForm, {'user': {'email': 'qwe@gmail.com'}}, {'user': {'email': 'qwe@gmail.com'}}),
+            (UserForm, {'user': {}}, {'user': {'email': None}}),
+            (UserForm, {'user': None}, {'user': None}),
+
+            (UsersDictForm, {'users': {'Mike': {'email': 'qwe@gmail.com'}}},
+             {'users': {'Mike': {'email': 'qwe@gmail.com'}}}),
+            (UsersDictForm, {'users': {'Mike': {'email': 'qwe@gmail.com'}, 'Bob': {}}},
+             {'users': {'Mike': {'email': 'qwe@gmail.com'}, 'Bob': {'email': None}}}),
+            (UsersDictForm, {'users': {}}, {'users': {}}),
+            (UsersDictForm, {'users': None}, {'users': None}),
+
+            (UsersListForm, {'users': [{'email': 'qwe@gmail.com'}]}, {'users': [{'email': 'qwe@gmail.com'}]}),
+            (UsersListForm, {'users': ({'email': email} for email in 'ab')},
+             {'users': [{'email': 'a'}, {'email': 'b'}]}),
+            (UsersListForm, {'users': []}, {'users': []}),
+            (UsersListForm, {'users': None}, {'users': []}),
+        ]:
+            with self.subTest(form=form.__name__, output_data=output_data):
+                self.assertDictEqual(form.process(output_data), expected_data)
@@ -1,75 +1,330 @@
-import unittest
+import os
+import jwt
 import json
+import time
+import base64
+import datetime
+import unittest
+
+from unittest.mock import patch, Mock
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 
 from ..forms import BaseInputForm, BaseOutputForm
 from ..fields import StringField, IntegerField
-from ..handlers import LambdaHandler, success_response
+from ..handlers import (LambdaHandler, BaseHandler, AuthHandler, RequestingUser, SECURITY_HEADERS, success_response,
+                        json_dumps, json_loads, get_jwt_settings, jwt_cache, permissions_cache, TTLCache)
+from ..exceptions import PermissionsError, AuthenticationError, InvalidValueError, ServerError
 
 
-class TestLambdaHandler(unittest.TestCase):
+# requests sending the same email via the query string and via the body
+EMAIL_QUERY_EVENT = {'queryStringParameters': {'email': 'qwe@gmail.com'}}
+EMAIL_BODY_EVENT = {'body': json.dumps({'email': 'qwe@gmail.com'})}
 
-    def test_basic_request(self):
+# the response to the email requests, computed by EmailLengthHandler
+EMAIL_LENGTH_RESPONSE = success_response({'age': 13})
 
-        class TestInputForm(BaseInputForm):
-            email = StringField(required=True)
 
-        class TestOutputForm(BaseOutputForm):
-            age = IntegerField()
+def call(lambda_handler, event: dict) -> dict:
+    """ Calls the lambda entry point and decodes the response body """
 
-        class TestHandler(LambdaHandler):
-            method = 'GET'
-            input_form = TestInputForm
-            output_form = TestOutputForm
+    return json.loads(lambda_handler(event, None)['body'])
 
-            def handler(self):
-                return {'age': len(self.input_data['email'])}
 
-        lambda_handler = TestHandler.get_lambda_handler()
+class EmailInputForm(BaseInputForm):
+    email = StringField(required=True)
+
+
+class AgeOutputForm(BaseOutputForm):
+    age = IntegerField()
+
+
+class EmailLengthHandler(LambdaHandler):
+    method = 'GET'
+    input_form = EmailInputForm
+    output_form = AgeOutputForm
+
+    def handler(self):
+        return {'age': len(self.input_data['email'])}
+
+
+class WrongOutputHandler(LambdaHandler):
+    method = 'GET'
+    input_form = EmailInputForm
+    output_form = AgeOutputForm
+
+    def handler(self):
+        return {'age': 'bad value'}
+
+
+class RaisingHandler(LambdaHandler):
+    method = 'GET'
+
+    def handler(self):
+        raise self.input_data['error']
+
+
+class InstanceHandler(LambdaHandler):
+    method = 'GET'
+
+    def handler(self):
+        return {'instance': id(self), 'input': self.input_data}
 
-        response = json.loads(lambda_handler({'queryStringParameters': {'email': 'qwe@gmail.com'}}, None)['body'])
-        expected_response = success_response({'age': 13})
-        self.assertEqual(response, expected_response)
 
-        response = json.loads(lambda_handler({'queryStringParameters': {}}, None)['body'])
+class EmailPostHandler(LambdaHandler):
+    method = 'POST'
+    input_form = EmailInputForm
+
+    def handler(self):
+        assert self.input_data['email'] == 'qwe@gmail.com'
+        return {}
+
+
+class RequestingUserHandler(BaseHandler):
+    method = 'GET'
+
+    def handler(self):
+        return {'email': self.requesting_user.email}
+
+
+class TestLambdaHandler(unittest.TestCase):
+
+    def test_basic_request(self):
+        lambda_handler = EmailLengthHandler.get_lambda_handler()
+
+        response = call(lambda_handler, EMAIL_QUERY_EVENT)
+        self.assertEqual(response, EMAIL_LENGTH_RESPONSE)
+
+        # the status checks don't need the serialized body
+        response = EmailLengthHandler().handle_request({'queryStringParameters': {}})
         self.assertEqual(response['status'], 'FAIL')
         self.assertEqual(response['status_code'], 400)
 
+        request_headers = {'X-Frame-Options': 'ALLOW', 'Accept': '*/*'}
+        response = lambda_handler({'queryStringParameters': {}, 'headers': request_headers}, None)
+        self.assertEqual(response['headers'], dict(SECURITY_HEADERS, Accept='*/*'))
+        self.assertEqual(request_headers, {'X-Frame-Options': 'ALLOW', 'Accept': '*/*'})
+
     def test_response_errors(self):
+        response = WrongOutputHandler().handle_request(EMAIL_QUERY_EVENT)
+        self.assertEqual(response['status'], 'FAIL')
+        self.assertEqual(response['status_code'], 500)
 
-        class TestInputForm(BaseInputForm):
-            email = StringField(required=True)
+    def test_error_status_codes(self):
+        lambda_handler = RaisingHandler().handle_request
 
-        class TestOutputForm(BaseOutputForm):
-            age = IntegerField()
+        for error, status_code in [(PermissionsError(), 403), (AuthenticationError(), 401),
+                                   (InvalidValueError('age', 1), 400), (ServerError(), 500), (KeyError(), 500)]:
+            response = lambda_handler({'queryStringParameters': {'error': error}})
+            self.assertEqual(response['status'], 'FAIL')
+            self.assertEqual(response['status_code'], status_code)
 
-        class TestHandler(LambdaHandler):
-            method = 'GET'
-            input_form = TestInputForm
-            output_form = TestOutputForm
+    def test_handler_instance_reuse(self):
+        lambda_handler = InstanceHandler.get_lambda_handler()
 
-            def handler(self):
-                return {'age': 'bad value'}
+        first = call(lambda_handler, EMAIL_QUERY_EVENT)
+        second = call(lambda_handler, {'queryStringParameters': None})
+        self.assertEqual(first['body']['instance'], second['body']['instance'])
+        self.assertEqual(second['body']['input'], {})
 
-        lambda_handler = TestHandler.get_lambda_handler()
+        # the entry point is created once per handler class
+        self.assertIs(InstanceHandler.get_lambda_handler(), lambda_handler)
 
-        response = json.loads(lambda_handler({'queryStringParameters': {'email': 'qwe@gmail.com'}}, None)['body'])
-        self.assertEqual(response['status'], 'FAIL')
-        self.assertEqual(response['status_code'], 500)
+    def test_json_helpers(self):
+        data = {'a': [1, 2.5, None, True], 1: 'int key', 'big': 2 ** 70}
+        self.assertEqual(json.loads(json_dumps(data)), json.loads(json.dumps(data)))
+
+        # the values json can't serialize are rejected with orjson as well
+        for value in [datetime.datetime.utcnow(), datetime.date.today(), object()]:
+            with self.subTest(value=value), self.assertRaises(TypeError):
+                json_dumps({'value': value})
+        self.assertEqual(json_loads('{"a": [1, 2.5, null]}'), {'a': [1, 2.5, None]})
+        self.assertEqual(json_loads(b'{"a": "b"}'), {'a': 'b'})
+
+        # the integers over 64 bits stay exact
+        for value in [2 ** 70 + 1, -2 ** 63 - 1, 2 ** 64 - 1]:
+            self.assertEqual(json_loads(json.dumps({'id': value})), {'id': value})
+            self.assertEqual(json_loads(json.dumps([value]).encode()), [value])
+
+        # the inputs accepted by the standard json are accepted as well
+        for data in ['[NaN, Infinity, -Infinity, 1e400]', b'[NaN, 1e400]', '"\\ud800"', b'"\\ud800"']:
+            with self.subTest(data=data):
+                self.assertEqual(repr(json_loads(data)), repr(json.loads(data)))
 
     def test_post_method(self):
+        response = EmailPostHandler().handle_request(EMAIL_BODY_EVENT)
+        self.assertEqual(response['status'], 'OK')
 
-        class TestInputForm(BaseInputForm):
-            email = StringField(required=True)
 
-        class TestHandler(LambdaHandler):
-            method = 'POST'
-            input_form = TestInputForm
+class TestAuth0Authenticator(unittest.TestCase):
 
-            def handler(self):
-                assert self.input_data['email'] == 'qwe@gmail.com'
-                return {}
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'api-factory')])
+        cert = x509.CertificateBuilder().subject_name(name).issuer_name(name) \
+            .public_key(cls.private_key.public_key()).serial_number(1) \
+            .not_valid_before(datetime.datetime.utcnow()) \
+            .not_valid_after(datetime.datetime.utcnow() + datetime.timedelta(days=1)) \
+            .sign(cls.private_key, hashes.SHA256(), default_backend())
+
+        cls.environ = patch.dict(os.environ, {
+            'JWT_CERT_KEY': base64.b64encode(cert.public_bytes(serialization.Encoding.PEM)).decode(),
+            'AUDIENCE': 'api-factory-tests',
+        })
+        cls.environ.start()
+        get_jwt_settings.cache_clear()
+
+        cls.handler = RequestingUserHandler()
+
+    @classmethod
+    def tearDownClass(cls):
+        # the settings loaded from the test environment must not outlive it
+        cls.environ.stop()
+        get_jwt_settings.cache_clear()
+
+    def setUp(self):
+        jwt_cache.clear()
+
+    def get_token(self, **payload):
+        payload = dict({'email': 'qwe@gmail.com', 'email_verified': True, 'aud': 'api-factory-tests',
+                        'exp': int(time.time()) + 60}, **payload)
+        payload = {key: value for key, value in payload.items() if value is not None}
+        token = jwt.encode(payload, self.private_key, algorithm='RS256')
+
+        # PyJWT 1.x returns the token as bytes, PyJWT 2.x as str
+        return token.decode() if isinstance(token, bytes) else token
+
+    def request(self, token):
+        return self.handler.handle_request({'headers': {'Authorization': 'Bearer ' + token}})
 
-        lambda_handler = TestHandler.get_lambda_handler()
+    def test_authentication(self):
+        response = self.request(self.get_token())
+        self.assertEqual(response, success_response({'email': 'qwe@gmail.com'}))
+        self.assertEqual(self.handler.requesting_user, RequestingUser('qwe@gmail.com'))
+        self.assertEqual(repr(self.handler.requesting_user), "RequestingUser(email='qwe@gmail.com')")
 
-        response = json.loads(lambda_handler({'body': json.dumps({'email': 'qwe@gmail.com'})}, None)['body'])
+        for token in [self.get_token(aud='another-audience'), self.get_token(exp=int(time.time()) - 1),
+                      self.get_token(email_verified=False), self.get_token(email=None), self.get_token(exp=None), 'qwe']:
+            response = self.request(token)
+            self.assertEqual(response['status_code'], 401)
+
+        response = self.handler.handle_request({'headers': {}})
+        self.assertEqual(response['status_code'], 401)
+
+        # the token is accepted without the scheme as well
+        response = self.handler.handle_request({'headers': {'Authorization': self.get_token()}})
         self.assertEqual(response['status'], 'OK')
+
+    def test_broken_certificate(self):
+        class PublicHandler(RequestingUserHandler):
+            authentication = False
+
+            def handler(self):
+                return {'email': None}
+
+        class PrivateHandler(RequestingUserHandler):
+            pass
+
+        try:
+            with patch.dict(os.environ, {'JWT_CERT_KEY': base64.b64encode(b'not a certificate').decode()}):
+                get_jwt_settings.cache_clear()
+
+                # the public handlers don't load the JWT certificate
+                response = call(PublicHandler.get_lambda_handler(), {'headers': {}})
+                self.assertEqual(response, success_response({'email': None}))
+
+                # the authenticated requests fail, but the handler is still created
+                response = call(PrivateHandler.get_lambda_handler(), {'headers': {'Authorization': self.get_token()}})
+                self.assertEqual(response['status_code'], 500)
+        finally:
+            get_jwt_settings.cache_clear()
+
+    def test_token_cache(self):
+        token = self.get_token()
+        self.assertEqual(self.request(token)['status'], 'OK')
+
+        with patch.object(jwt.PyJWT, 'decode') as jwt_decode:
+            self.assertEqual(self.request(token)['status'], 'OK')
+            jwt_decode.assert_not_called()
+
+        # expired tokens are dropped from the cache
+        token = self.get_token(exp=int(time.time()) + 1)
+        self.assertEqual(self.request(token)['status'], 'OK')
+        with patch('time.time', return_value=time.time() + 2), patch.object(jwt.PyJWT, 'decode') as jwt_decode:
+            jwt_decode.side_effect = jwt.ExpiredSignatureError()
+            self.assertEqual(self.request(token)['status_code'], 401)
+            jwt_decode.assert_called_once()
+
+
+class TestAuthHandler(unittest.TestCase):
+
+    def setUp(self):
+        permissions_cache.clear()
+
+        # the authentication is not a part of these tests
+        self.handler = AuthHandler.__new__(AuthHandler)
+        self.handler.requesting_user = RequestingUser('qwe@gmail.com')
+
+    @patch.dict(os.environ, {'AUTHORIZER_FUNC': 'authorizer'})
+    def test_permissions_cache(self):
+        granted = success_response({'access_is_allowed': True})
+        denied = success_response({'access_is_allowed': False})
+
+        with patch.object(AuthHandler, 'call_lambda', return_value=granted) as call_lambda:
+            self.handler.authorize(action='read', event_id=1)
+            self.handler.authorize(event_id=1, action='read')
+            self.assertEqual(call_lambda.call_count, 1)
+
+            self.handler.authorize(action='write', event_id=1)
+            self.assertEqual(call_lambda.call_count, 2)
+
+        # the denied permissions are not cached
+        with patch.object(AuthHandler, 'call_lambda', return_value=denied) as call_lambda:
+            for _ in range(2):
+                with self.assertRaises(PermissionsError):
+                    self.handler.authorize(action='delete', event_id=1)
+            self.assertEqual(call_lambda.call_count, 2)
+
+    def test_call_lambda(self):
+        self.handler.event = {'headers': {'Authorization': 'Bearer token'}}
+        payload = json.dumps({'body': json.dumps(success_response({'access_is_allowed': True}))}).encode()
+
+        lambda_client = Mock()
+        lambda_client.invoke.return_value = {'Payload': Mock(read=Mock(return_value=payload))}
+        with patch.object(AuthHandler, 'lambda_client', lambda_client):
+            response = self.handler.call_lambda('authorizer', {'action': 'read'})
+
+        self.assertEqual(response, success_response({'access_is_allowed': True}))
+        self.assertEqual(json.loads(lambda_client.invoke.call_args[1]['Payload']),
+                         {'queryStringParameters': {'action': 'read'}, 'headers': {'Authorization': 'Bearer token'}})
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_maxsize(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        # replacing a cached value doesn't evict the others
+        cache.set('b', 3)
+        self.assertEqual((cache.get('a'), cache.get('b')), (1, 3))
+
+        # a new value evicts the oldest one
+        cache.set('c', 4)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (None, 3, 4))
+
+    def test_expiration(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1, expires_at=time.time() - 1)
+        cache.set('b', 2, expires_at=time.time() + 3600)
+        self.assertIsNone(cache.get('a'))
+
+        # the values never outlive the cache ttl
+        with patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get('b'))
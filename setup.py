@@ -14,6 +14,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/smartxpo-solutions/api-factory",
     packages=setuptools.find_packages(),
+    extras_require={
+        'speedups': ['orjson'],
+    },
     license='MIT License',
     classifiers=(
         'Intended Audience :: Developers',